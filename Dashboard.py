@@ -2,7 +2,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly_resampler import FigureResampler
+from plotly_resampler.aggregation import MinMaxLTTB
 import numpy as np
+import json
+import os
+import re
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv as pacsv
+from functools import partial
 from io import BytesIO
 
 # -----------------------
@@ -37,6 +46,12 @@ body { background: var(--bg); }
   box-sizing: border-box;
 }
 
+.kpi-row {
+  display: grid;
+  grid-template-columns: repeat(4, minmax(0, 1fr));
+  gap: 1rem;
+}
+
 /* label, value, caption */
 .metric-label { font-size:13px; color:var(--muted); margin:0; }
 .metric-value { font-size:24px; font-weight:700; color:#111827; margin:0; }
@@ -51,6 +66,9 @@ body { background: var(--bg); }
   .metric-value { font-size:20px; }
   .kpi { height: 115px; padding:12px; }
 }
+@media (max-width:640px){
+  .kpi-row { grid-template-columns: 1fr; }
+}
 @media (max-width:480px){
   .metric-label { font-size:12px; }
   .metric-value { font-size:18px; }
@@ -60,31 +78,104 @@ body { background: var(--bg); }
 </style>
 """
 
-st.markdown(base_css, unsafe_allow_html=True)
+@st.cache_resource
+def minified_css(css):
+    # comments and layout whitespace stripped once per process; the style block still has to be
+    # emitted on every run (Streamlit drops elements a rerun doesn't write), so keep it small
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,>])\s*", r"\1", css).replace(";}", "}").strip()
+
+st.markdown(minified_css(base_css), unsafe_allow_html=True)
 
 # -------------------------
 # Palette and constants
 # -------------------------
 PALETTE = {"Low": "#10B981", "Medium": "#F59E0B", "High": "#EF4444"}
+UNKNOWN_COLOR = "#9CA3AF"
 ICON_TEMP = "🌡️"
 ICON_HUM = "💧"
 ICON_VEH = "🚗"
 ICON_ACC = "⚠️"
+# day names for the int8 dayofweek codes added in load_data (Monday=0)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
 
 # -------------------------
 # Load data
 # -------------------------
-@st.cache_data
-def load_data(path="merged_dataset.csv"):
-    df = pd.read_csv(path)
-    if "date_time" in df.columns:
-        df["date_time"] = pd.to_datetime(df["date_time"], errors="coerce")
+DATA_PATH = "merged_dataset.csv"
+
+# columns the dashboard reads (charts, KPIs and the Data & Export tab); others are not loaded
+USED_COLS = [
+    "date_time", "season", "area", "weather_condition", "road_condition", "congestion_level",
+    "temperature_c", "humidity", "rain_mm", "wind_speed_kmh", "visibility_m", "air_pressure_hpa",
+    "avg_speed_kmh", "vehicle_count", "accident_count",
+]
+
+# low-cardinality text columns, stored as category so filters/groupbys work on integer codes;
+# fixed lists pin the code order where the dashboard relies on it
+CATEGORY_DTYPES = {
+    "season": pd.CategoricalDtype(["Winter", "Spring", "Summer", "Autumn"]),
+    "area": "category",
+    "weather_condition": "category",
+    "road_condition": "category",
+    "congestion_level": pd.CategoricalDtype(["Low", "Medium", "High", "Unknown"]),
+}
+# marker colour per congestion code (pinned order above); the trailing entry is for code -1 (missing)
+PALETTE_ARR = np.array(
+    [PALETTE.get(lvl, UNKNOWN_COLOR) for lvl in CATEGORY_DTYPES["congestion_level"].categories] + [UNKNOWN_COLOR]
+)
+
+def load_data(path=DATA_PATH):
+    # a Parquet copy next to the CSV keeps the parsed dtypes and loads much faster;
+    # it persists across server restarts and is rebuilt whenever the CSV is newer
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(parquet_path) and (
+        not os.path.exists(path) or os.path.getmtime(parquet_path) >= os.path.getmtime(path)
+    ):
+        df = pd.read_parquet(parquet_path, engine="pyarrow")
+        # also brings a copy written with an older category order in line
+        df = df.astype({c: t for c, t in CATEGORY_DTYPES.items() if c in df.columns})
     else:
-        raise KeyError("Missing required column: date_time")
+        columns = pd.read_csv(path, nrows=0).columns
+        if "date_time" not in columns:
+            raise KeyError("Missing required column: date_time")
+        df = pd.read_csv(
+            path,
+            usecols=[c for c in USED_COLS if c in columns],
+            dtype={c: t for c, t in CATEGORY_DTYPES.items() if c in columns},
+            parse_dates=["date_time"],
+        )
+        # parse_dates leaves the column as text if any value fails to parse; those become NaT
+        if not pd.api.types.is_datetime64_any_dtype(df["date_time"]):
+            df["date_time"] = pd.to_datetime(df["date_time"], errors="coerce")
+        try:
+            df.to_parquet(parquet_path, engine="pyarrow", compression="zstd")
+        except OSError:
+            # read-only deployments just keep using the CSV
+            pass
+
+    # same column order whichever path loaded it (read_csv keeps the file's order; this also
+    # trims a Parquet copy written with an older column list)
+    df = df[[c for c in USED_COLS if c in df.columns]]
+
+    # kept sorted by date_time so filter_df can cut the date range with a binary search
+    if not df["date_time"].is_monotonic_increasing:
+        df = df.sort_values("date_time", kind="stable").reset_index(drop=True)
+
+    # calendar fields for the heatmap, derived once per load instead of on every rerun;
+    # rows without a timestamp (NaT) get -1 — they sort last and never fall inside a date range
+    df["hour"] = df["date_time"].dt.hour.fillna(-1).astype("int8")
+    df["dayofweek"] = df["date_time"].dt.dayofweek.fillna(-1).astype("int8")
     return df
 
+@st.cache_resource
+def get_df(path=DATA_PATH):
+    # one shared frame per server process (not copied per rerun like st.cache_data); treat as read-only
+    return load_data(path)
+
 try:
-    df = load_data()
+    df = get_df(DATA_PATH)
 except Exception as e:
     st.error(f"Failed loading dataset: {e}")
     st.stop()
@@ -101,51 +192,45 @@ st.markdown(
 )
 
 # metrics (safe fallbacks if columns missing)
-avg_temp = df["temperature_c"].mean() if "temperature_c" in df.columns else 0
-avg_humidity = df["humidity"].mean() if "humidity" in df.columns else 0
-total_vehicles = int(df["vehicle_count"].sum()) if "vehicle_count" in df.columns else 0
-total_accidents = int(df["accident_count"].sum()) if "accident_count" in df.columns else 0
+KPI_AGGS = {"temperature_c": "mean", "humidity": "mean", "vehicle_count": "sum", "accident_count": "sum"}
+
+@st.cache_data
+def kpi_values(data_key):
+    # over the unfiltered frame, so computed in one agg call per dataset and reused on every rerun
+    df = get_df(data_key)
+    spec = {col: how for col, how in KPI_AGGS.items() if col in df.columns}
+    kpis = df.agg(spec) if spec else pd.Series(dtype="float64")
+    return {col: kpis.get(col, 0) for col in KPI_AGGS}
+
+kpis = kpi_values(DATA_PATH)
+avg_temp = kpis["temperature_c"]
+avg_humidity = kpis["humidity"]
+total_vehicles = int(kpis["vehicle_count"])
+total_accidents = int(kpis["accident_count"])
 
 # -------
 # KPI Row
 # -------
-k1, k2, k3, k4 = st.columns([1.3, 1.3, 1.3, 1.3])
-
-with k1:
-    st.markdown(f"""
-        <div class="kpi">
-            <div class="metric-label">{ICON_TEMP} Average Temperature (°C)</div>
-            <div class="metric-value">{avg_temp:.1f}</div>
-            <div class="metric-caption">Average temperature for the selected period.</div>
-        </div>
-    """, unsafe_allow_html=True)
-
-with k2:
-    st.markdown(f"""
-        <div class="kpi">
-            <div class="metric-label">{ICON_HUM} Avg Humidity (%)</div>
-            <div class="metric-value">{avg_humidity:.0f}</div>
-            <div class="metric-caption">Average humidity for the selected period.</div>
-        </div>
-    """, unsafe_allow_html=True)
-
-with k3:
-    st.markdown(f"""
-        <div class="kpi">
-            <div class="metric-label">{ICON_VEH} Total Vehicles</div>
-            <div class="metric-value">{total_vehicles:,}</div>
-            <div class="metric-caption">Total vehicle count in the filtered dataset.</div>
-        </div>
-    """, unsafe_allow_html=True)
-
-with k4:
-    st.markdown(f"""
-        <div class="kpi">
-            <div class="metric-label">{ICON_ACC} Total Accidents</div>
-            <div class="metric-value">{total_accidents:,}</div>
-            <div class="metric-caption">Total accidents in the selected filters.</div>
-        </div>
-    """, unsafe_allow_html=True)
+# the four cards are rendered from one template into a single markdown block (laid out
+# by the .kpi-row grid), instead of one st.columns cell + markdown call per card
+KPI_TMPL = (
+    '<div class="kpi"><div class="metric-label">{icon} {label}</div>'
+    '<div class="metric-value">{value}</div><div class="metric-caption">{caption}</div></div>'
+)
+kpi_rows = [
+    {"icon": ICON_TEMP, "label": "Average Temperature (°C)", "value": f"{avg_temp:.1f}",
+     "caption": "Average temperature for the selected period."},
+    {"icon": ICON_HUM, "label": "Avg Humidity (%)", "value": f"{avg_humidity:.0f}",
+     "caption": "Average humidity for the selected period."},
+    {"icon": ICON_VEH, "label": "Total Vehicles", "value": f"{total_vehicles:,}",
+     "caption": "Total vehicle count in the filtered dataset."},
+    {"icon": ICON_ACC, "label": "Total Accidents", "value": f"{total_accidents:,}",
+     "caption": "Total accidents in the selected filters."},
+]
+st.markdown(
+    '<div class="kpi-row">' + "".join(KPI_TMPL.format_map(k) for k in kpi_rows) + "</div>",
+    unsafe_allow_html=True,
+)
 
 st.write("\n")
 
@@ -154,15 +239,11 @@ st.write("\n")
 # ----------------------------
 st.sidebar.title("Filters")
 
-# Seasons as individual checkboxes 
+# Seasons as one multiselect (a single widget instead of one checkbox per season)
 seasons_list = sorted(df["season"].dropna().unique()) if "season" in df.columns else []
 st.sidebar.markdown("### Seasons")
-season_checks = {}
-for s in seasons_list:
-    # default to True to keep previous behavior (all selected)
-    season_checks[s] = st.sidebar.checkbox(s, value=True)
-# collect selected seasons
-season = [s for s, checked in season_checks.items() if checked]
+# default to all selected to keep previous behavior
+season = st.sidebar.multiselect("Seasons to include", options=seasons_list, default=seasons_list)
 
 # --- Area dropdown with fixed choices ---
 st.sidebar.markdown("### Area filter")
@@ -197,24 +278,56 @@ with st.sidebar.expander("Advanced"):
 # -------------------------
 # Apply filters
 # -------------------------
-df_f = df.copy()
-
-# seasons filter (from checkboxes)
-if season and "season" in df_f.columns:
-    df_f = df_f[df_f["season"].isin(season)]
+# Cached on the filter values only (the shared frame is fetched inside, so no DataFrame
+# is hashed), and reruns triggered by display-only widgets reuse the filtered frame.
+# Everything keyed on the filter tuple is bounded: the key space (date range x slider x
+# seasons x area) is open-ended across sessions. Export bytes are full copies of the
+# filtered data, so fewer of them are kept.
+FILTER_CACHE_ENTRIES = 64
+EXPORT_CACHE_ENTRIES = 8
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def filter_df(data_key, seasons, area, start, end, acc_threshold):
+    df = get_df(data_key)
+
+    # date range: rows are sorted by date_time, so the range is one contiguous slice
+    dt = df["date_time"].to_numpy()
+    lo = np.searchsorted(dt, start.to_datetime64(), side="left")
+    hi = np.searchsorted(dt, end.to_datetime64(), side="right")
+    df = df.iloc[lo:hi]
+
+    # the remaining predicates are combined into one mask over that slice and applied
+    # in a single pass, instead of copying the frame and re-slicing it once per filter
+    mask = np.ones(len(df), dtype=bool)
+
+    # seasons filter (from the multiselect)
+    if seasons and "season" in df.columns:
+        # compared on the int8 category codes; names not among the categories match nothing
+        season_cat = df["season"].cat
+        selected = season_cat.categories.get_indexer(list(seasons))
+        mask &= np.isin(season_cat.codes.to_numpy(), selected[selected >= 0])
+
+    # area dropdown filter
+    if area and area != "All" and "area" in df.columns:
+        mask &= (df["area"] == area).to_numpy()
+
+    # advanced filters
+    if "accident_count" in df.columns:
+        mask &= (df["accident_count"] >= acc_threshold).to_numpy()
 
-# area dropdown filter
-if area and area != "All" and "area" in df_f.columns:
-    df_f = df_f[df_f["area"] == area]
+    return df.loc[mask]
 
-# advanced filters
-if "accident_count" in df_f.columns:
-    df_f = df_f[df_f["accident_count"] >= acc_threshold]
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def resample_counts(_df_f, filter_key, freq):
+    # vehicle totals per period (the trend chart's input); empty frame if the column is missing
+    cols = [c for c in ["vehicle_count"] if c in _df_f.columns]
+    # binned on the date_time column with a Grouper, so no time index is built for the frame
+    return _df_f.groupby(pd.Grouper(key="date_time", freq=freq))[cols].sum().fillna(0)
 
-# date range
 start = pd.to_datetime(dt_range[0])
 end = pd.to_datetime(dt_range[1]) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-df_f = df_f[(df_f["date_time"] >= start) & (df_f["date_time"] <= end)]
+filter_key = (DATA_PATH, tuple(sorted(season)), area, start, end, acc_threshold)
+df_f = filter_df(*filter_key)
 
 # empty guard
 if df_f.empty:
@@ -224,27 +337,295 @@ if df_f.empty:
 # -------------------------
 # Prepare series + aggregations
 # -------------------------
-df_time_all = df_f.set_index("date_time").sort_index()
-vehicle_daily = df_time_all["vehicle_count"].resample("D").sum().fillna(0) if "vehicle_count" in df_time_all.columns else pd.Series(dtype="float64")
-
-if agg == "Daily":
-    vehicle_agg = vehicle_daily
-    delta_period = 7
-elif agg == "Weekly":
-    vehicle_agg = vehicle_daily.resample("W").sum() if not vehicle_daily.empty else vehicle_daily
-    delta_period = 1
-else:
-    vehicle_agg = vehicle_daily.resample("M").sum() if not vehicle_daily.empty else vehicle_daily
-    delta_period = 1
-
-def pct_change(s, shift):
-    if len(s) <= shift:
-        return 0.0
-    curr = s.iloc[-1]
-    prev = s.iloc[-1-shift]
-    if prev == 0:
-        return 0.0
-    return (curr - prev) / prev * 100
+counts_daily = resample_counts(df_f, filter_key, "D")
+
+# weekly/monthly vehicle totals are re-aggregated from the cached daily bins
+agg_freq = {"Daily": "D", "Weekly": "W", "Monthly": "M"}[agg]
+counts_agg = counts_daily if agg == "Daily" else counts_daily.resample(agg_freq).sum()
+vehicle_agg = counts_agg["vehicle_count"] if "vehicle_count" in counts_agg.columns else pd.Series(dtype="float64")
+
+def category_sums(cat, values=None):
+    # totals of `values` (row counts if omitted) per category of `cat`, from one bincount over the integer codes
+    codes = cat.cat.codes.to_numpy()
+    seen = codes >= 0
+    weights = None if values is None else values.fillna(0).to_numpy()[seen]
+    totals = np.bincount(codes[seen], weights=weights, minlength=len(cat.cat.categories))
+    return pd.Series(totals, index=cat.cat.categories)
+
+def rolling_mean(series, window):
+    # trailing mean over `window` periods (NaN until the window fills), as one convolution
+    # over the raw values instead of a pandas Rolling object
+    x = series.to_numpy(dtype="float64")
+    out = np.full(x.size, np.nan)
+    if x.size >= window:
+        out[window - 1:] = np.convolve(x, np.ones(window), mode="valid") / window
+    return pd.Series(out, index=series.index)
+
+# -------------------------
+# Cached aggregations
+# -------------------------
+# Keyed on the filter tuple (and frequency) only, so display-only changes such as the
+# theme or grid toggle rebuild a figure without redoing its groupby.
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def accident_by_weather(_df_f, filter_key, freq):
+    # reduce clutter: keep top weather categories (up to 8 lines), restricting the rows
+    # before the groupby; the row filter is skipped when there are no more than 8 anyway
+    counts = category_sums(_df_f["weather_condition"])
+    counts = counts[counts > 0]
+    rows = _df_f
+    if len(counts) > 8:
+        top_weather = counts.nlargest(8).index
+        rows = _df_f[_df_f["weather_condition"].isin(top_weather).to_numpy()]
+    return (
+        rows
+        .groupby([pd.Grouper(key="date_time", freq=freq), "weather_condition"], observed=True)["accident_count"]
+        .sum()
+        .reset_index()
+    )
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def accident_heat(_df_f, filter_key):
+    # the day-of-week x hour totals are a 7x24 histogram: one bincount over the flat cell
+    # index, keeping only cells that have rows (as the groupby did); day names are mapped
+    # onto the small result
+    cell = _df_f["dayofweek"].to_numpy(dtype=np.intp) * 24 + _df_f["hour"].to_numpy(dtype=np.intp)
+    totals = np.bincount(cell, weights=_df_f["accident_count"].fillna(0).to_numpy(), minlength=7 * 24)
+    seen = np.flatnonzero(np.bincount(cell, minlength=7 * 24))
+    heat = pd.DataFrame({
+        "wd": seen // 24,
+        "hour": seen % 24,
+        "accident_count": totals[seen],
+    })
+    heat["weekday"] = pd.Categorical.from_codes(heat["wd"], categories=WEEKDAYS, ordered=True)
+    return heat
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def area_congestion(_df_f, filter_key):
+    if "congestion_level" in _df_f.columns:
+        return _df_f.groupby(["area", "congestion_level"], observed=True)["vehicle_count"].sum().reset_index()
+    return _df_f.groupby("area", observed=True)["vehicle_count"].sum().reset_index().sort_values("vehicle_count", ascending=False)
+
+# -------------------------
+# Cached chart builders
+# -------------------------
+# Each builder returns its figure as Plotly JSON, cached on the filter tuple plus the
+# display options it uses, so reruns that don't touch those inputs skip figure construction.
+# The theme is passed straight to the px constructors, so each template is applied once
+# (px would otherwise apply the global default first and update_layout would replace it).
+# The grid toggle is only a layout flag, so it is applied to the rehydrated figure instead
+# of being part of the cache key.
+def show_chart(spec, show_grid=None):
+    fig = go.Figure(json.loads(spec))
+    if show_grid is not None:
+        fig.update_xaxes(showgrid=show_grid)
+        fig.update_yaxes(showgrid=show_grid)
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def scatter_chart(_df_f, filter_key, theme):
+    # one WebGL trace for all points; colour comes from the congestion codes so
+    # plotly doesn't split the data into a trace per level
+    marker = dict(opacity=0.6, line=dict(width=0))
+    if "vehicle_count" in _df_f.columns:
+        sizes = _df_f["vehicle_count"].to_numpy()
+        marker.update(size=sizes, sizemode="area", sizeref=2.0 * max(np.nanmax(sizes, initial=0), 1) / 50 ** 2, sizemin=1)
+    levels = []
+    if "congestion_level" in _df_f.columns:
+        cong = _df_f["congestion_level"].cat
+        levels = cong.categories.tolist()
+        marker.update(color=PALETTE_ARR[cong.codes.to_numpy()])
+    fig = go.Figure(go.Scattergl(
+        x=_df_f["temperature_c"],
+        y=_df_f["avg_speed_kmh"],
+        mode="markers",
+        marker=marker,
+        text=_df_f["area"] if "area" in _df_f.columns else None,
+        hovertemplate="<b>%{text}</b><br>Temp (°C): %{x}<br>Avg Speed (km/h): %{y}<extra></extra>",
+        showlegend=False,
+    ))
+    # legend-only entries so the congestion colours stay labelled
+    present = set(_df_f["congestion_level"].unique()) if levels else set()
+    for lvl in levels:
+        if lvl in present:
+            fig.add_trace(go.Scattergl(x=[None], y=[None], mode="markers", name=lvl,
+                                       marker=dict(color=PALETTE.get(lvl, UNKNOWN_COLOR), size=10)))
+    fig.update_layout(
+        title="Temperature vs Speed (bubble = vehicles)",
+        xaxis_title="Temp (°C)",
+        yaxis_title="Avg Speed (km/h)",
+        template=theme,
+        legend=dict(title="Congestion", orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=50, b=20, l=20, r=20)
+    )
+    return fig.to_json()
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def box_chart(_df_f, filter_key, theme, show_outliers):
+    fig = px.box(
+        _df_f,
+        x="congestion_level",
+        y="avg_speed_kmh",
+        points="outliers" if show_outliers else False,
+        category_orders={"congestion_level": ["Low", "Medium", "High"]},
+        title="Distribution of Avg Speed by Congestion Level",
+        labels={"avg_speed_kmh": "Avg Speed (km/h)", "congestion_level": "Congestion Level"},
+        template=theme,
+    )
+    fig.update_layout(margin=dict(t=40, b=10, l=10, r=10))
+    return fig.to_json()
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def accident_line_chart(_df_f, filter_key, theme, freq_label, freq):
+    acc_df = accident_by_weather(_df_f, filter_key, freq)
+    fig = px.line(
+        acc_df,
+        x="date_time",
+        y="accident_count",
+        color="weather_condition",
+        title=f"{freq_label} Accident Count by Weather Condition",
+        labels={"date_time": "Date", "accident_count": "Accidents", "weather_condition": "Weather"},
+        template=theme,
+    )
+    fig.update_layout(
+        legend=dict(orientation="h", y=-0.2),
+        margin=dict(t=40, b=20, l=10, r=10)
+    )
+    return fig.to_json()
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def weather_pie_chart(_df_f, filter_key, theme):
+    counts = category_sums(_df_f["weather_condition"])
+    counts = counts[counts > 0]  # observed categories only, as value_counts on the labels gave
+    cond = pd.DataFrame({"condition": counts.index, "count": counts.to_numpy()})
+    fig = px.pie(cond, values="count", names="condition", hole=0.55, title="Weather distribution", template=theme)
+    fig.update_layout(margin=dict(t=40, b=10, l=10, r=10))
+    return fig.to_json()
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def road_pie_chart(_df_f, filter_key, theme):
+    desired_order = ["Snowy", "Dry", "Wet", "Damaged"]
+    road = _df_f["road_condition"]
+
+    # counts per category from the codes; missing values are reported as "Unknown"
+    counts = {k: int(v) for k, v in category_sums(road).items() if v > 0}
+    n_missing = int(road.isna().sum())
+    if n_missing:
+        counts["Unknown"] = counts.get("Unknown", 0) + n_missing
+
+    # the expected conditions first (zeros kept), then any others by count, in one frame
+    others = sorted((k for k in counts if k not in desired_order), key=counts.get, reverse=True)
+    ordered = desired_order + others
+    road_df = pd.DataFrame({
+        "condition": ordered,
+        "count": [counts.get(k, 0) for k in ordered]
+    })
+
+    try:
+        color_seq = px.colors.qualitative.Plotly
+    except Exception:
+        color_seq = None
+
+    fig = px.pie(
+        road_df,
+        values="count",
+        names="condition",
+        hole=0.55,
+        title="Road condition distribution",
+        color_discrete_sequence=color_seq,
+        template=theme
+    )
+    fig.update_layout(margin=dict(t=40, b=10, l=10, r=10))
+    return fig.to_json()
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def accident_heatmap(_df_f, filter_key, theme):
+    heat = accident_heat(_df_f, filter_key)
+    fig = px.density_heatmap(
+        heat, x="hour", y="weekday", z="accident_count",
+        category_orders={"weekday": WEEKDAYS},
+        title="Accidents heatmap (hour vs day)",
+        template=theme
+    )
+    return fig.to_json()
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def vehicle_trend_chart(_plot_series, filter_key, agg, roll, theme):
+    rolling = rolling_mean(_plot_series, roll)
+    # series longer than 1000 points are downsampled with MinMaxLTTB before being sent to the
+    # browser; the chart is static, so the resampler's legend annotations are turned off
+    fig = FigureResampler(
+        go.Figure(),
+        default_n_shown_samples=1000,
+        default_downsampler=MinMaxLTTB(),
+        resampled_trace_prefix_suffix=("", ""),
+        show_mean_aggregation_size=False,
+    )
+    fig.add_trace(go.Scattergl(mode="lines", name="Total"), hf_x=_plot_series.index, hf_y=_plot_series.values)
+    fig.add_trace(go.Scattergl(mode="lines", name=f"{roll}-period rolling mean"), hf_x=rolling.index, hf_y=rolling.values)
+    fig.update_layout(
+        title="Vehicle counts over time",
+        xaxis_title="Date",
+        yaxis_title="Vehicles",
+        template=theme,
+        margin=dict(t=40, b=20, l=10, r=10)
+    )
+    return fig.to_json()
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def area_congestion_chart(_df_f, filter_key, theme):
+    cong = area_congestion(_df_f, filter_key)
+    if "congestion_level" in cong.columns:
+        fig = px.bar(cong, x="area", y="vehicle_count", color="congestion_level", color_discrete_map=PALETTE,
+                     title="Vehicles by congestion level per area", template=theme)
+    else:
+        fig = px.bar(cong, x="area", y="vehicle_count", title="Vehicles per area", template=theme)
+    fig.update_layout(margin=dict(t=40, b=20, l=10, r=10))
+    return fig.to_json()
+
+# -------------------------
+# Cached preview + export payloads
+# -------------------------
+# the calendar helper columns added in load_data are internal; preview and downloads leave them out
+DERIVED_COLS = ["hour", "dayofweek"]
+
+@st.cache_data(max_entries=FILTER_CACHE_ENTRIES)
+def preview_table(_df_f, filter_key, rows=200):
+    # converted to Arrow once per filter tuple
+    head = _df_f.head(rows).drop(columns=DERIVED_COLS, errors="ignore")
+    return pa.Table.from_pandas(head, preserve_index=False)
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES)
+def csv_bytes(_df_f, filter_key):
+    # pyarrow's CSV writer emits bytes directly, without pandas' per-row Python formatting;
+    # date_time is pre-formatted to match pandas' output (whole seconds, no nanosecond suffix)
+    table = pa.Table.from_pandas(_df_f.drop(columns=DERIVED_COLS, errors="ignore"), preserve_index=False)
+    if "date_time" in table.column_names:
+        i = table.schema.get_field_index("date_time")
+        stamps = pc.cast(table["date_time"], pa.timestamp("s"), safe=False)
+        table = table.set_column(i, "date_time", pc.strftime(stamps, format="%Y-%m-%d %H:%M:%S"))
+    buf = BytesIO()
+    pacsv.write_csv(table, buf)
+    return buf.getvalue()
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES)
+def parquet_bytes(_df_f, filter_key):
+    buf = BytesIO()
+    _df_f.drop(columns=DERIVED_COLS, errors="ignore").to_parquet(buf, engine="pyarrow", compression="zstd", index=False)
+    return buf.getvalue()
+
+# -------------------------
+# Static assets (Monte Carlo + Factor Analysis tabs)
+# -------------------------
+# read from disk once per process instead of on every rerun
+@st.cache_resource
+def asset_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+@st.cache_data
+def load_mc_results(path="assets/simulation_results.csv"):
+    raw = asset_bytes(path)
+    return pd.read_csv(BytesIO(raw)), raw
 
 # -------------------------
 # Tabs with improved charts
@@ -262,42 +643,13 @@ with tab1:
     # Scatter with min/max size and better legend placement
     with left:
         st.markdown("**Temperature × Avg Speed × Vehicle Count**  \n*Bubble size represents vehicle density*")
-        size_ref = max(df_f["vehicle_count"].max() if "vehicle_count" in df_f.columns else 1, 1)
-        fig = px.scatter(
-            df_f,
-            x="temperature_c" if "temperature_c" in df_f.columns else None,
-            y="avg_speed_kmh" if "avg_speed_kmh" in df_f.columns else None,
-            size="vehicle_count" if "vehicle_count" in df_f.columns else None,
-            size_max=50,
-            color="congestion_level" if "congestion_level" in df_f.columns else None,
-            color_discrete_map=PALETTE,
-            hover_name="area" if "area" in df_f.columns else None,
-            hover_data={"vehicle_count": True, "date_time": True} if "vehicle_count" in df_f.columns else {"date_time": True},
-            labels={"temperature_c": "Temp (°C)", "avg_speed_kmh": "Avg Speed (km/h)"},
-            title="Temperature vs Speed (bubble = vehicles)"
-        )
-        fig.update_layout(
-            legend=dict(title="Congestion", orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            template=theme_choice,
-            margin=dict(t=50, b=20, l=20, r=20)
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(scatter_chart(df_f, filter_key, theme_choice))
 
         # Box Plot  Avg Speed vs Congestion Level 
         st.markdown("### Box Plot Avg Speed vs Congestion Level")
         if "avg_speed_kmh" in df_f.columns and "congestion_level" in df_f.columns:
             try:
-                fig_box = px.box(
-                    df_f,
-                    x="congestion_level",
-                    y="avg_speed_kmh",
-                    points="outliers" if show_outliers else False,
-                    category_orders={"congestion_level": ["Low", "Medium", "High"]},
-                    title="Distribution of Avg Speed by Congestion Level",
-                    labels={"avg_speed_kmh": "Avg Speed (km/h)", "congestion_level": "Congestion Level"},
-                )
-                fig_box.update_layout(template=theme_choice, margin=dict(t=40, b=10, l=10, r=10))
-                st.plotly_chart(fig_box, use_container_width=True)
+                show_chart(box_chart(df_f, filter_key, theme_choice, show_outliers))
                 st.markdown("<div class='small-note'>Box plot helps compare speed variability across congestion levels.</div>", unsafe_allow_html=True)
             except Exception as e:
                 st.error(f"Couldn't build box plot: {e}")
@@ -311,34 +663,7 @@ with tab1:
 
         if "accident_count" in df_f.columns and "weather_condition" in df_f.columns:
             try:
-                acc_df = (
-                    df_f
-                    .groupby([pd.Grouper(key="date_time", freq=freq), "weather_condition"])["accident_count"]
-                    .sum()
-                    .reset_index()
-                )
-
-                # reduce clutter: keep top weather categories
-                weather_counts = df_f["weather_condition"].value_counts().index.tolist()
-                top_weather = weather_counts[:8]  # show up to 8 lines
-                acc_df = acc_df[acc_df["weather_condition"].isin(top_weather)]
-
-                fig_acc = px.line(
-                    acc_df,
-                    x="date_time",
-                    y="accident_count",
-                    color="weather_condition",
-                    title=f"{acc_line_freq} Accident Count by Weather Condition",
-                    labels={"date_time": "Date", "accident_count": "Accidents", "weather_condition": "Weather"},
-                )
-                fig_acc.update_layout(
-                    template=theme_choice,
-                    legend=dict(orientation="h", y=-0.2),
-                    margin=dict(t=40, b=20, l=10, r=10)
-                )
-                fig_acc.update_xaxes(showgrid=show_grid)
-                fig_acc.update_yaxes(showgrid=show_grid)
-                st.plotly_chart(fig_acc, use_container_width=True)
+                show_chart(accident_line_chart(df_f, filter_key, theme_choice, acc_line_freq, freq), show_grid)
                 st.markdown("<div class='small-note'>Aggregation frequency can be changed from the sidebar. Top weather types are shown to reduce clutter.</div>", unsafe_allow_html=True)
             except Exception as e:
                 st.error(f"Couldn't build accidents line chart: {e}")
@@ -348,11 +673,7 @@ with tab1:
     with right:
         st.subheader("Weather Conditions")
         if "weather_condition" in df_f.columns:
-            cond = df_f["weather_condition"].value_counts().reset_index()
-            cond.columns = ["condition", "count"]
-            fig2 = px.pie(cond, values="count", names="condition", hole=0.55, title="Weather distribution")
-            fig2.update_layout(template=theme_choice, margin=dict(t=40, b=10, l=10, r=10))
-            st.plotly_chart(fig2, use_container_width=True)
+            show_chart(weather_pie_chart(df_f, filter_key, theme_choice))
             st.markdown("<div class='small-note'>Click a slice to inspect details in hover.</div>", unsafe_allow_html=True)
         else:
             st.info("No `weather_condition` column available to show distribution.")
@@ -361,39 +682,8 @@ with tab1:
          # Road condition pie
 
         st.subheader("Road Conditions")
-        desired_order = ["Snowy", "Dry", "Wet", "Damaged"]
         if "road_condition" in df_f.columns:
-          
-            road_series = df_f["road_condition"].astype(str).fillna("Unknown")
-            
-            counts = road_series.value_counts()
-            
-            road_df = pd.DataFrame({
-                "condition": desired_order,
-                "count": [int(counts.get(k, 0)) for k in desired_order]
-            })
-            
-            others = [k for k in counts.index if k not in desired_order]
-            if others:
-                others_df = pd.DataFrame({"condition": others, "count": [int(counts[k]) for k in others]})
-                road_df = pd.concat([road_df, others_df], ignore_index=True)
-
-            
-            try:
-                color_seq = px.colors.qualitative.Plotly
-            except Exception:
-                color_seq = None
-
-            fig_road = px.pie(
-                road_df,
-                values="count",
-                names="condition",
-                hole=0.55,
-                title="Road condition distribution",
-                color_discrete_sequence=color_seq
-            )
-            fig_road.update_layout(template=theme_choice, margin=dict(t=40, b=10, l=10, r=10))
-            st.plotly_chart(fig_road, use_container_width=True)
+            show_chart(road_pie_chart(df_f, filter_key, theme_choice))
             st.markdown("<div class='small-note'>Road condition distribution for the filtered data. Categories: Snowy, Dry, Wet, Damaged.</div>", unsafe_allow_html=True)
         else:
             st.info("No `road_condition` column available to show distribution. Make sure your CSV has a `road_condition` column with values like Snowy, Dry, Wet, Damaged.")
@@ -402,26 +692,8 @@ with tab2:
     st.subheader("Detailed analysis")
 
     # Heatmap accidents
-    df_f = df_f.copy()
-    if "date_time" in df_f.columns:
-        df_f["hour"] = df_f["date_time"].dt.hour
-        df_f["weekday"] = df_f["date_time"].dt.day_name()
-    else:
-        df_f["hour"] = 0
-        df_f["weekday"] = "Monday"
-
     if "accident_count" in df_f.columns:
-        heat = df_f.groupby(["weekday", "hour"])["accident_count"].sum().reset_index()
-        weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        heat["weekday"] = pd.Categorical(heat["weekday"], categories=weekdays, ordered=True)
-        heat = heat.sort_values(["weekday", "hour"])
-        fig3 = px.density_heatmap(
-            heat, x="hour", y="weekday", z="accident_count",
-            category_orders={"weekday": weekdays},
-            title="Accidents heatmap (hour vs day)"
-        )
-        fig3.update_layout(template=theme_choice)
-        st.plotly_chart(fig3, use_container_width=True)
+        show_chart(accident_heatmap(df_f, filter_key, theme_choice))
     else:
         st.info("Heatmap requires `accident_count` column.")
 
@@ -429,30 +701,11 @@ with tab2:
 
     # Trend
     st.subheader("Vehicle trend")
-    if "vehicle_count" in df_time_all.columns:
-        if agg == "Daily":
-            plot_series = df_time_all["vehicle_count"].resample("D").sum().fillna(0)
-            roll = 7
-        elif agg == "Weekly":
-            plot_series = df_time_all["vehicle_count"].resample("W").sum().fillna(0)
-            roll = 4
-        else:
-            plot_series = df_time_all["vehicle_count"].resample("M").sum().fillna(0)
-            roll = 3
-        rolling = plot_series.rolling(roll).mean()
-        fig4 = go.Figure()
-        fig4.add_trace(go.Scatter(x=plot_series.index, y=plot_series.values, mode="lines", name="Total"))
-        fig4.add_trace(go.Scatter(x=rolling.index, y=rolling.values, mode="lines", name=f"{roll}-period rolling mean"))
-        fig4.update_layout(
-            title="Vehicle counts over time",
-            xaxis_title="Date",
-            yaxis_title="Vehicles",
-            template=theme_choice,
-            xaxis=dict(showgrid=show_grid),
-            yaxis=dict(showgrid=show_grid),
-            margin=dict(t=40, b=20, l=10, r=10)
-        )
-        st.plotly_chart(fig4, use_container_width=True)
+    if "vehicle_count" in counts_agg.columns:
+        # same series as vehicle_agg, already aggregated at the selected frequency
+        plot_series = vehicle_agg
+        roll = {"Daily": 7, "Weekly": 4, "Monthly": 3}[agg]
+        show_chart(vehicle_trend_chart(plot_series, filter_key, agg, roll, theme_choice), show_grid)
 
     #     # download PNG
     #     try:
@@ -468,33 +721,34 @@ with tab2:
     # Congestion by area stacked
     st.subheader("Congestion by area")
     if "area" in df_f.columns and "vehicle_count" in df_f.columns:
-        if "congestion_level" in df_f.columns:
-            cong = df_f.groupby(["area", "congestion_level"])["vehicle_count"].sum().reset_index()
-            fig5 = px.bar(cong, x="area", y="vehicle_count", color="congestion_level", color_discrete_map=PALETTE,
-                          title="Vehicles by congestion level per area")
-        else:
-            cong = df_f.groupby("area")["vehicle_count"].sum().reset_index().sort_values("vehicle_count", ascending=False)
-            fig5 = px.bar(cong, x="area", y="vehicle_count", title="Vehicles per area")
-        fig5.update_layout(template=theme_choice, margin=dict(t=40, b=20, l=10, r=10))
-        st.plotly_chart(fig5, use_container_width=True)
+        show_chart(area_congestion_chart(df_f, filter_key, theme_choice))
     else:
         st.info("Congestion chart requires `area` and `vehicle_count` columns.")
 
 with tab3:
     st.subheader("Data & Export")
     st.write("Preview of filtered data (first 200 rows):")
-    st.dataframe(df_f.head(200))
-
-    csv = df_f.to_csv(index=False).encode("utf-8")
-    st.download_button("Download filtered CSV", data=csv, file_name="filtered_traffic_weather.csv", mime="text/csv")
+    st.dataframe(preview_table(df_f, filter_key))
+
+    # export files are only serialized when a download button is clicked (callable data)
+    st.download_button("Download filtered CSV", data=partial(csv_bytes, df_f, filter_key), file_name="filtered_traffic_weather.csv", mime="text/csv")
+    st.download_button(
+        "Download filtered Parquet",
+        data=partial(parquet_bytes, df_f, filter_key),
+        file_name="filtered_traffic_weather.parquet",
+        mime="application/octet-stream"
+    )
 
     st.markdown("**Quick insights:**")
+    # argmax over the categories present in the filtered rows (category_sums covers every category)
     try:
-        top_area = df_f.groupby("area")["vehicle_count"].sum().idxmax()
+        area_totals = category_sums(df_f["area"], df_f["vehicle_count"])
+        top_area = area_totals[category_sums(df_f["area"]) > 0].idxmax()
     except Exception:
         top_area = "N/A"
     try:
-        worst_cond = df_f.groupby("weather_condition")["accident_count"].sum().idxmax()
+        cond_totals = category_sums(df_f["weather_condition"], df_f["accident_count"])
+        worst_cond = cond_totals[category_sums(df_f["weather_condition"]) > 0].idxmax()
     except Exception:
         worst_cond = "N/A"
     st.markdown(f"- Area with highest vehicles: **{top_area}**")
@@ -506,7 +760,7 @@ with tab4:
 
     # Image 
     st.image(
-        "assets/congestion_probability_distribution_1-converted.webp",  
+        asset_bytes("assets/congestion_probability_distribution_1-converted.webp"),
         use_container_width=True
     )
     # Description text
@@ -519,7 +773,7 @@ with tab4:
     st.divider()
   
     try:
-        mc_df = pd.read_csv("assets/simulation_results.csv")
+        mc_df, mc_csv = load_mc_results()
 
         st.markdown("### Simulation Results (CSV)")
         st.dataframe(mc_df, use_container_width=True)
@@ -527,11 +781,10 @@ with tab4:
         "Each row contains the actual probability of high congestion and accident risk calculated from the original dataset and the predicted probability extracted from the Monte Carlo simulation along with standard deviation and 95% confidence interval"
         )
 
-        # Download button
-        csv_bytes = mc_df.to_csv(index=False).encode("utf-8")
+        # Download button (the cached file contents, served as-is)
         st.download_button(
             label="Download Monte Carlo Results (CSV)",
-            data=csv_bytes,
+            data=mc_csv,
             file_name="monte_carlo_results.csv",
             mime="text/csv"
         )
@@ -544,14 +797,14 @@ with tab5:
     st.title("Factor Analysis")
 
     st.image(
-            "assets/scree_plot.webp", use_container_width=True
+            asset_bytes("assets/scree_plot.webp"), use_container_width=True
         )
     st.caption(
             "Pick best factors based on eginvalues"
         )
 
     st.image(
-            "assets/correlation_matrix.webp" 
+            asset_bytes("assets/correlation_matrix.webp")
             , use_container_width=True
         )
     st.caption(